@@ -0,0 +1,19 @@
+"""Compile the pattern scanner ahead of time into the v20_patterns extension.
+
+_patterns.py imports the extension when it exists, so scans skip numba's
+JIT compile step entirely. Build it next to the scanner with:
+
+    python build_patterns_ext.py
+"""
+import os
+
+from numba.pycc import CC
+
+from _patterns import _find_patterns_loop
+
+cc = CC('v20_patterns')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+cc.export('find_patterns_nb', 'Tuple((i8[:], i8[:], f4[:]))(f4[:], f4[:], f4)')(_find_patterns_loop)
+
+if __name__ == "__main__":
+    cc.compile()
@@ -1,22 +1,46 @@
+import numpy as np
 import pandas as pd
 import yfinance as yf
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 import sys
-import pytz
+import logging
+import multiprocessing as mp
+from itertools import islice
+from zoneinfo import ZoneInfo
 
-# Initial debug output
-print("\n" + "=" * 80)
-print("V20 SCANNER SCRIPT STARTING")
-print("=" * 80)
-print(f"Python version: {sys.version}")
-print(f"Current directory: {os.getcwd()}")
-print(f"Files in current directory: {os.listdir('.')}")
-print(f"stocks.xlsx exists? {os.path.exists('stocks.xlsx')}")
-print("=" * 80 + "\n")
+from _patterns import find_patterns
+
+log = logging.getLogger('v20')
+
+IST = ZoneInfo('Asia/Kolkata')
+
+# Bump when the cached columns change so stale caches are ignored
+CACHE_VERSION = "v1"
+
+# Below this many symbols the compiled scan finishes faster in-process than
+# a process pool can start up and receive the DataFrames
+POOL_MIN_JOBS = 1000
+
+@dataclass
+class Patterns:
+    """Green candle patterns of one symbol, stored as parallel arrays"""
+    start_date: list[str]
+    start_price: np.ndarray
+    end_price: np.ndarray
+    gain_percent: np.ndarray
+    candles: np.ndarray
+    
+    @classmethod
+    def empty(cls):
+        return cls([], np.empty(0), np.empty(0), np.empty(0), np.empty(0, dtype=np.int64))
+    
+    def __len__(self):
+        return len(self.start_date)
 
 class V20Scanner:
     def __init__(self, excel_file_path, email_to, email_from, email_password):
@@ -25,87 +49,238 @@ class V20Scanner:
         self.email_from = email_from
         self.email_password = email_password
         self.alerts = []
+        self.chunk_size = 20
+        self._analysis = {}
+        self.cache_dir = os.path.join(os.path.expanduser('~'), '.v20cache', CACHE_VERSION)
         
     def read_stocks_from_excel(self):
-        """Read stock symbols from Excel file"""
+        """Read stock symbols from Excel file.
+        
+        The parsed sheets are kept in a parquet sidecar next to the workbook
+        and reused until the workbook is modified.
+        """
         try:
-            xls = pd.ExcelFile(self.excel_file_path)
+            folder, name = os.path.split(self.excel_file_path)
+            sidecar = os.path.join(folder, f".{os.path.splitext(name)[0]}.parquet")
+            
+            if (os.path.exists(sidecar)
+                    and os.path.getmtime(sidecar) >= os.path.getmtime(self.excel_file_path)):
+                table = pd.read_parquet(sidecar)
+            else:
+                table = self._read_excel_table()
+                try:
+                    table.to_parquet(sidecar)
+                except Exception as e:
+                    log.error(f"Error writing {sidecar}: {e}")
+            
             stocks = {}
-            for sheet_name in ['v40', 'v40next', 'v200']:
-                if sheet_name in xls.sheet_names:
-                    df = pd.read_excel(xls, sheet_name=sheet_name)
-                    stocks[sheet_name] = df.iloc[:, 1].dropna().tolist()
+            for group, symbols in table.groupby('group', sort=False)['symbol']:
+                stocks[group] = symbols.tolist()
             return stocks
         except Exception as e:
-            print(f"Error reading Excel file: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"Error reading Excel file: {e}")
             return {}
     
-    def find_20_percent_patterns(self, symbol, days=365):
-        """Find consecutive green candle patterns with 20%+ gain"""
+    def _read_excel_table(self):
+        """Parse symbols (Column B) of each sheet into a group/symbol table"""
+        frames = []
+        with pd.ExcelFile(self.excel_file_path, engine='openpyxl') as xls:
+            for sheet_name in ['v40', 'v40next', 'v200']:
+                if sheet_name in xls.sheet_names:
+                    df = pd.read_excel(xls, sheet_name=sheet_name, usecols=[1])
+                    symbols = df.iloc[:, 0].dropna().astype(str)
+                    frames.append(pd.DataFrame({'group': sheet_name, 'symbol': symbols}))
+        
+        if not frames:
+            return pd.DataFrame({'group': [], 'symbol': []})
+        return pd.concat(frames, ignore_index=True)
+    
+    def _cache_path(self, symbol):
+        return os.path.join(self.cache_dir, f"{symbol}.parquet")
+    
+    def _load_cached(self, symbol):
+        """Load cached OHLC history for a symbol, or None if not cached"""
+        path = self._cache_path(symbol)
+        if not os.path.exists(path):
+            return None
+        
         try:
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-            
-            stock = yf.Ticker(symbol)
-            df = stock.history(start=start_date, end=end_date)
+            return pd.read_parquet(path)
+        except Exception as e:
+            log.error(f"Error reading cache for {symbol}: {e}")
+            return None
+    
+    def _save_cached(self, symbol, df):
+        """Write a symbol's OHLC history to the cache atomically"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._cache_path(symbol)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            df.to_parquet(tmp_path, compression='zstd')
+            os.replace(tmp_path, path)
+        except Exception as e:
+            log.error(f"Error writing cache for {symbol}: {e}")
+    
+    def _download_chunk(self, symbols, start):
+        """Download daily OHLC for symbols from start; returns {symbol: df}"""
+        try:
+            prices = yf.download(" ".join(symbols), start=start.strftime('%Y-%m-%d'), group_by="ticker",
+                                 threads=True, progress=False, auto_adjust=False)
+        except Exception as e:
+            log.error(f"Error downloading {symbols}: {e}")
+            return {}
+        
+        fresh = {}
+        for symbol in symbols:
+            if isinstance(prices.columns, pd.MultiIndex):
+                if symbol not in prices.columns.get_level_values(0):
+                    continue
+                df = prices[symbol]
+            elif not prices.empty:
+                df = prices
+            else:
+                continue
             
+            df = df.dropna(subset=['Open', 'Close'])
             if df.empty:
-                return []
+                continue
+            if df.index.tz is not None:
+                df.index = df.index.tz_localize(None)
+            fresh[symbol] = df
+        return fresh
+    
+    @staticmethod
+    def _matches_cache(cached, new):
+        """Check that re-fetched bars agree with the cached ones.
+        
+        Yahoo back-adjusts Open/Close for splits, so after a split the
+        overlapping bars no longer match and the cache is on the old scale.
+        Opens are compared because the last cached close may have been an
+        intraday snapshot.
+        """
+        overlap = cached.index.intersection(new.index)
+        if overlap.empty:
+            return False
+        return np.allclose(cached.loc[overlap, 'Open'].to_numpy(dtype=np.float64),
+                           new.loc[overlap, 'Open'].to_numpy(dtype=np.float64), rtol=0.01)
+    
+    def download_history(self, symbols, days=365):
+        """Download daily OHLC history in batches of chunk_size symbols.
+        
+        Symbols with cached history only fetch the bars since their last
+        cached date; the merged history is written back to the cache.
+        Symbols for which Yahoo returns no bars are left out.
+        """
+        cutoff = pd.Timestamp(datetime.now().date() - timedelta(days=days))
+        cached = {symbol: self._load_cached(symbol) for symbol in symbols}
+        cached = {symbol: df if df is not None and not df.empty else None
+                  for symbol, df in cached.items()}
+        
+        # Group uncached symbols together so they don't force a full
+        # download for chunks that only need a few recent bars
+        pending = iter(sorted(cached, key=lambda symbol: cached[symbol] is not None))
+        history = {}
+        
+        while chunk := list(islice(pending, self.chunk_size)):
+            last_dates = [cached[symbol].index.max() for symbol in chunk if cached[symbol] is not None]
+            start = min(last_dates) if len(last_dates) == len(chunk) else cutoff
+            fresh = self._download_chunk(chunk, start)
             
-            patterns = []
-            i = 0
+            stale = [symbol for symbol in chunk
+                     if cached[symbol] is not None and symbol in fresh
+                     and not self._matches_cache(cached[symbol], fresh[symbol])]
+            if stale:
+                log.warning(f"Cached prices no longer match Yahoo (split?), re-downloading: {stale}")
+                for symbol in stale:
+                    cached[symbol] = None
+                    fresh.pop(symbol)
+                fresh.update(self._download_chunk(stale, cutoff))
             
-            while i < len(df):
-                start_idx = i
-                start_price = df.iloc[i]['Open']
-                current_high = df.iloc[i]['Close']
-                
-                j = i
-                consecutive_green = 0
-                
-                while j < len(df) and df.iloc[j]['Close'] > df.iloc[j]['Open']:
-                    current_high = max(current_high, df.iloc[j]['Close'])
-                    consecutive_green += 1
-                    j += 1
-                
-                if consecutive_green > 0:
-                    gain_percent = ((current_high - start_price) / start_price) * 100
-                    
-                    if gain_percent >= 20:
-                        patterns.append({
-                            'start_date': df.index[start_idx].strftime('%Y-%m-%d'),
-                            'start_price': round(start_price, 2),
-                            'end_price': round(current_high, 2),
-                            'gain_percent': round(gain_percent, 2),
-                            'candles': consecutive_green
-                        })
+            for symbol in chunk:
+                if symbol not in fresh:
+                    # Don't report a stale cached close as the current price
+                    log.warning(f"No price data downloaded for {symbol}, skipping")
+                    continue
                 
-                i = j if j > i else i + 1
+                df = fresh[symbol]
+                if cached[symbol] is not None:
+                    # Re-fetched bars replace cached ones (the last cached
+                    # bar may have been an intraday snapshot)
+                    df = pd.concat([cached[symbol], df])
+                    df = df[~df.index.duplicated(keep='last')].sort_index()
+                df = df[df.index >= cutoff]
+                self._save_cached(symbol, df)
+                history[symbol] = df
+        
+        return history
+    
+    @staticmethod
+    def find_20_percent_patterns(df):
+        """Find consecutive green candle patterns with 20%+ gain"""
+        try:
+            if df is None or df.empty:
+                return Patterns.empty()
+            
+            # float32 copies (always writable, as the compiled scanner expects)
+            open_arr = df['Open'].to_numpy(dtype=np.float32, copy=True)
+            close_arr = df['Close'].to_numpy(dtype=np.float32, copy=True)
+            dates = df.index.values
             
-            return patterns
+            starts, ends, run_max = find_patterns(open_arr, close_arr, np.float32(20))
+            start_prices = open_arr[starts]
+            gain_pct = (run_max - start_prices) / start_prices * 100
+            
+            # Widen before rounding so reported prices print as 2-decimal values
+            return Patterns(
+                start_date=np.datetime_as_string(dates[starts], unit='D').tolist(),
+                start_price=np.round(start_prices.astype(np.float64), 2),
+                end_price=np.round(run_max.astype(np.float64), 2),
+                gain_percent=np.round(gain_pct.astype(np.float64), 2),
+                candles=ends - starts
+            )
         except Exception as e:
-            print(f"Error analyzing {symbol}: {e}")
-            return []
+            log.error(f"Error analyzing patterns: {e}")
+            return Patterns.empty()
     
-    def get_current_price_and_sma(self, symbol):
-        """Get current price and 200 SMA"""
+    @staticmethod
+    def get_current_price_and_sma(df):
+        """Get current price and 200 SMA from the last 200 sessions of df.
+        
+        df is the same 365-day history used for pattern detection, so no
+        separate download is needed.
+        """
         try:
-            stock = yf.Ticker(symbol)
-            df = stock.history(period='220d')
-            
-            if df.empty:
+            if df is None or df.empty:
                 return None, None
             
-            current_price = df.iloc[-1]['Close']
-            sma_200 = df['Close'].rolling(window=200).mean().iloc[-1] if len(df) >= 200 else None
+            close = df['Close'].to_numpy(dtype=np.float64, copy=False)
+            current_price = float(np.round(close[-1], 2))
+            sma_200 = float(np.round(close[-200:].mean(), 2)) if close.size >= 200 else None
             
-            return round(current_price, 2), round(sma_200, 2) if sma_200 else None
+            return current_price, sma_200
         except Exception as e:
-            print(f"Error getting current price for {symbol}: {e}")
+            log.error(f"Error getting current price: {e}")
             return None, None
     
+    def analyze_all(self, history):
+        """Get patterns, current price and 200 SMA for every downloaded symbol.
+        
+        The analysis is CPU-bound and independent per symbol, so very large
+        symbol sets are spread across a process pool.
+        """
+        jobs = list(history.items())
+        processes = min(os.cpu_count() or 1, len(jobs))
+        
+        if processes <= 1 or len(jobs) < POOL_MIN_JOBS:
+            results = map(scan_one, jobs)
+            self._analysis.update((symbol, tuple(rest)) for symbol, *rest in results)
+            return
+        
+        # spawn, so workers don't inherit the parent's logging state
+        with mp.get_context('spawn').Pool(processes) as pool:
+            for symbol, *rest in pool.imap_unordered(scan_one, jobs, chunksize=4):
+                self._analysis[symbol] = tuple(rest)
+    
     def check_alerts(self, symbol, group, patterns, current_price, sma_200=None):
         """Check if stock meets alert conditions"""
         if not patterns or current_price is None:
@@ -115,173 +290,179 @@ class V20Scanner:
             if sma_200 is None or current_price >= sma_200:
                 return
         
-        for pattern in patterns:
-            start_price = pattern['start_price']
-            difference_percent = abs((current_price - start_price) / start_price) * 100
+        start_prices = patterns.start_price
+        diff_pct = np.abs(current_price - start_prices) / start_prices * 100
+        activated = diff_pct <= 1
+        near = (diff_pct <= 5) & (current_price < start_prices) & ~activated
+        
+        for k in np.flatnonzero(activated | near):
+            start_price = start_prices[k]
+            difference_percent = diff_pct[k]
             
-            if difference_percent <= 1:
-                alert_msg = f"V20 ACTIVATED - {symbol} ({group})\n"
-                alert_msg += f"   Current Price: Rs.{current_price}\n"
-                alert_msg += f"   Pattern Start: Rs.{start_price} (Date: {pattern['start_date']})\n"
-                alert_msg += f"   Pattern Gain: {pattern['gain_percent']}%\n"
-                if group == 'v200' and sma_200:
-                    alert_msg += f"   200 SMA: Rs.{sma_200}\n"
-                self.alerts.append(alert_msg)
+            if activated[k]:
+                parts = [
+                    f"V20 ACTIVATED - {symbol} ({group})",
+                    f"   Current Price: Rs.{current_price}",
+                    f"   Pattern Start: Rs.{start_price} (Date: {patterns.start_date[k]})",
+                    f"   Pattern Gain: {patterns.gain_percent[k]}%",
+                ]
+            else:
+                parts = [
+                    f"NEAR V20 - {symbol} ({group})",
+                    f"   Current Price: Rs.{current_price}",
+                    f"   Pattern Start: Rs.{start_price} (Date: {patterns.start_date[k]})",
+                    f"   Difference: {round(difference_percent, 2)}%",
+                    f"   Pattern Gain: {patterns.gain_percent[k]}%",
+                ]
+            if group == 'v200' and sma_200:
+                parts.append(f"   200 SMA: Rs.{sma_200}")
             
-            elif difference_percent <= 5 and current_price < start_price:
-                alert_msg = f"NEAR V20 - {symbol} ({group})\n"
-                alert_msg += f"   Current Price: Rs.{current_price}\n"
-                alert_msg += f"   Pattern Start: Rs.{start_price} (Date: {pattern['start_date']})\n"
-                alert_msg += f"   Difference: {round(difference_percent, 2)}%\n"
-                alert_msg += f"   Pattern Gain: {pattern['gain_percent']}%\n"
-                if group == 'v200' and sma_200:
-                    alert_msg += f"   200 SMA: Rs.{sma_200}\n"
-                self.alerts.append(alert_msg)
+            # Trailing newline keeps a blank line between alerts in the email
+            parts.append("")
+            self.alerts.append("\n".join(parts))
     
     def send_email(self):
         """Send consolidated email with all alerts"""
         if not self.alerts:
-            print("No alerts to send.")
+            log.info("No alerts to send.")
             return
         
         try:
             msg = MIMEMultipart()
             msg['From'] = self.email_from
             msg['To'] = self.email_to
-            msg['Subject'] = f"V20 Scanner Alerts - {datetime.now().strftime('%Y-%m-%d')}"
+            now_ist = datetime.now(IST)
+            msg['Subject'] = f"V20 Scanner Alerts - {now_ist.strftime('%Y-%m-%d')}"
             
-            body = "V20 SCANNER DAILY REPORT\n"
-            body += "=" * 50 + "\n\n"
-            body += f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M IST')}\n"
-            body += f"Total Alerts: {len(self.alerts)}\n\n"
-            body += "=" * 50 + "\n\n"
-            body += "\n".join(self.alerts)
-            body += "\n\n" + "=" * 50 + "\n"
-            body += "Note: V20 pattern = 20%+ gain from consecutive green candles\n"
-            body += "NEAR = Current price within 5% of pattern start\n"
-            body += "ACTIVATED = Current price matches pattern start\n"
+            rule = "=" * 50
+            body = "\n".join([
+                "V20 SCANNER DAILY REPORT",
+                rule,
+                "",
+                f"Date: {now_ist.strftime('%Y-%m-%d %H:%M IST')}",
+                f"Total Alerts: {len(self.alerts)}",
+                "",
+                rule,
+                "",
+                "\n".join(self.alerts),
+                "",
+                rule,
+                "Note: V20 pattern = 20%+ gain from consecutive green candles",
+                "NEAR = Current price within 5% of pattern start",
+                "ACTIVATED = Current price matches pattern start",
+                "",
+            ])
             
             msg.attach(MIMEText(body, 'plain'))
             
-            server = smtplib.SMTP('smtp.gmail.com', 587)
-            server.starttls()
-            server.login(self.email_from, self.email_password)
-            server.send_message(msg)
-            server.quit()
+            # One connection and login per run; the context manager
+            # closes it even if sending fails
+            with smtplib.SMTP('smtp.gmail.com', 587) as server:
+                server.starttls()
+                server.login(self.email_from, self.email_password)
+                server.send_message(msg)
             
-            print(f"✅ Email sent successfully with {len(self.alerts)} alerts!")
+            log.info(f"✅ Email sent successfully with {len(self.alerts)} alerts!")
         except Exception as e:
-            print(f"❌ Error sending email: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception(f"❌ Error sending email: {e}")
     
     def run_scan(self):
         """Main scanning function"""
-        print("\n" + "=" * 80)
-        print("RUN_SCAN FUNCTION CALLED")
-        print("=" * 80)
-        print(f"Starting V20 scan at {datetime.now()}")
-        print("=" * 80 + "\n")
+        log.info(f"Starting V20 scan at {datetime.now(IST)}")
         
         # Check if it's weekend - TEMPORARILY DISABLED FOR TESTING
-        # ist = pytz.timezone('Asia/Kolkata')
-        # now_ist = datetime.now(ist)
+        # now_ist = datetime.now(IST)
         # if now_ist.weekday() >= 5:
-        #     print("Weekend - No scan performed")
+        #     log.info("Weekend - No scan performed")
         #     return
         
-        print("Reading Excel file...")
         stocks = self.read_stocks_from_excel()
         
-        print(f"\n{'='*60}")
-        print(f"EXCEL FILE READ SUCCESSFULLY")
-        print(f"Total groups found: {len(stocks)}")
+        log.info(f"Total groups found: {len(stocks)}")
         for group, symbols in stocks.items():
-            print(f"  {group}: {len(symbols)} stocks")
-            print(f"  Symbols: {symbols[:3]}..." if len(symbols) > 3 else f"  Symbols: {symbols}")
-        print(f"{'='*60}\n")
+            log.info(f"  {group}: {len(symbols)} stocks")
+            log.debug(f"  Symbols: {symbols[:3]}..." if len(symbols) > 3 else f"  Symbols: {symbols}")
         
         if not stocks or all(len(v) == 0 for v in stocks.values()):
-            print("ERROR: No stocks found in Excel file!")
-            print("Please check:")
-            print("  1. Excel file name is 'stocks.xlsx'")
-            print("  2. Sheet names are: v40, v40next, v200")
-            print("  3. Stock symbols are in Column B")
+            log.error("No stocks found in Excel file! Please check:\n"
+                      "  1. Excel file name is 'stocks.xlsx'\n"
+                      "  2. Sheet names are: v40, v40next, v200\n"
+                      "  3. Stock symbols are in Column B")
             return
         
         total_patterns_found = 0
         
+        # Yahoo serves up to 20 symbols per request, so download every
+        # group's history in batches instead of one request per symbol.
+        # Symbols listed in several sheets are downloaded only once.
+        log.info("Downloading price history...")
+        history = self.download_history(symbol for symbols in stocks.values() for symbol in symbols)
+        self.analyze_all(history)
+        
         for group, symbols in stocks.items():
-            print(f"\n{'='*60}")
-            print(f"Scanning {group} group ({len(symbols)} stocks)...")
-            print(f"{'='*60}")
+            log.info(f"Scanning {group} group ({len(symbols)} stocks)...")
             
             for symbol in symbols:
                 try:
-                    print(f"\n  Analyzing {symbol}...")
+                    log.debug(f"  Analyzing {symbol}...")
                     
-                    patterns = self.find_20_percent_patterns(symbol)
+                    patterns, current_price, sma_200 = self._analysis.get(symbol, (Patterns.empty(), None, None))
                     
                     if patterns:
-                        print(f"    ✓ Found {len(patterns)} pattern(s) with 20%+ gain")
-                        for idx, p in enumerate(patterns, 1):
-                            print(f"      Pattern {idx}: Start={p['start_date']}, Price=Rs.{p['start_price']}, Gain={p['gain_percent']}%")
+                        log.debug(f"    ✓ Found {len(patterns)} pattern(s) with 20%+ gain")
+                        for idx, (start_date, start_price, gain) in enumerate(
+                                zip(patterns.start_date, patterns.start_price, patterns.gain_percent), 1):
+                            log.debug(f"      Pattern {idx}: Start={start_date}, Price=Rs.{start_price}, Gain={gain}%")
                         total_patterns_found += len(patterns)
                         
-                        current_price, sma_200 = self.get_current_price_and_sma(symbol)
-                        print(f"    Current Price: Rs.{current_price}")
+                        log.debug(f"    Current Price: Rs.{current_price}")
                         
                         if group == 'v200' and sma_200:
                             price_vs_sma = "BELOW" if current_price < sma_200 else "ABOVE"
-                            print(f"    200 SMA: Rs.{sma_200} (Price is {price_vs_sma} SMA)")
+                            log.debug(f"    200 SMA: Rs.{sma_200} (Price is {price_vs_sma} SMA)")
                         
                         alerts_before = len(self.alerts)
                         self.check_alerts(symbol, group, patterns, current_price, sma_200)
                         alerts_after = len(self.alerts)
                         
                         if alerts_after > alerts_before:
-                            print(f"    🔔 ALERT GENERATED!")
+                            log.info(f"  🔔 ALERT GENERATED for {symbol} ({group})")
                         else:
-                            print(f"    ℹ️  Pattern found but doesn't meet alert conditions")
-                            print(f"       (Current price not within 5% below any pattern start)")
+                            log.debug(f"    ℹ️  Pattern found but doesn't meet alert conditions")
                     else:
-                        print(f"    - No 20% patterns found in last year")
+                        log.debug(f"    - No 20% patterns found in last year")
                     
                 except Exception as e:
-                    print(f"  ❌ Error processing {symbol}: {e}")
-                    import traceback
-                    traceback.print_exc()
+                    log.exception(f"  ❌ Error processing {symbol}: {e}")
                     continue
         
-        print(f"\n{'='*80}")
-        print(f"SCAN SUMMARY")
-        print(f"{'='*80}")
-        print(f"Total 20% patterns found: {total_patterns_found}")
-        print(f"Total alerts generated: {len(self.alerts)}")
-        print(f"{'='*80}\n")
+        log.info(f"Total 20% patterns found: {total_patterns_found}")
+        log.info(f"Total alerts generated: {len(self.alerts)}")
         
         if self.alerts:
-            print("📧 Attempting to send email...")
-            print(f"From: {self.email_from}")
-            print(f"To: {self.email_to}")
-            print(f"Number of alerts: {len(self.alerts)}\n")
+            log.info(f"📧 Sending {len(self.alerts)} alerts from {self.email_from} to {self.email_to}...")
             self.send_email()
         else:
-            print("\n⚠️  No alerts generated today.")
-            print("\nREASON: Patterns were found but current prices don't meet alert conditions:")
-            print("  - NEAR ALERT: Current price must be within 5% BELOW pattern start price")
-            print("  - ACTIVATED ALERT: Current price must match pattern start (within 1%)")
-            print("  - v200 CONDITION: Price must also be BELOW 200 SMA")
-            print("\nThis is normal - it means no buying opportunities right now.")
+            log.info("⚠️  No alerts generated today - current prices don't meet alert conditions:\n"
+                     "  - NEAR ALERT: Current price must be within 5% BELOW pattern start price\n"
+                     "  - ACTIVATED ALERT: Current price must match pattern start (within 1%)\n"
+                     "  - v200 CONDITION: Price must also be BELOW 200 SMA")
         
-        print("\n" + "=" * 80)
-        print("SCAN COMPLETED SUCCESSFULLY")
-        print("=" * 80)
+        log.info("Scan completed successfully")
+
+def scan_one(job):
+    """Analyze one (symbol, history) job; runs in a worker process"""
+    symbol, df = job
+    patterns = V20Scanner.find_20_percent_patterns(df)
+    current_price, sma_200 = V20Scanner.get_current_price_and_sma(df) if patterns else (None, None)
+    return symbol, patterns, current_price, sma_200
 
 if __name__ == "__main__":
-    print("\n" + "=" * 80)
-    print("MAIN EXECUTION STARTING")
-    print("=" * 80)
+    logging.basicConfig(level=os.environ.get('V20_LOG_LEVEL', 'INFO'),
+                        format="%(message)s", stream=sys.stdout)
+    
+    log.debug(f"Python version: {sys.version}")
+    log.debug(f"Current directory: {os.getcwd()}")
     
     # Configuration
     EXCEL_FILE = "stocks.xlsx"
@@ -289,25 +470,14 @@ if __name__ == "__main__":
     EMAIL_FROM = os.environ.get('EMAIL_FROM')
     EMAIL_PASSWORD = os.environ.get('EMAIL_PASSWORD')
     
-    print(f"Excel File: {EXCEL_FILE}")
-    print(f"Email To: {EMAIL_TO}")
-    print(f"Email From: {EMAIL_FROM}")
-    print(f"Email Password: {'*' * len(EMAIL_PASSWORD) if EMAIL_PASSWORD else 'NOT SET'}")
-    print("=" * 80 + "\n")
+    log.debug(f"Excel File: {EXCEL_FILE} (exists? {os.path.exists(EXCEL_FILE)})")
+    log.debug(f"Email To: {EMAIL_TO}")
+    log.debug(f"Email From: {EMAIL_FROM}")
     
     if not EMAIL_FROM or not EMAIL_PASSWORD:
-        print("ERROR: Email credentials not set!")
-        print("EMAIL_FROM:", EMAIL_FROM)
-        print("EMAIL_PASSWORD:", "SET" if EMAIL_PASSWORD else "NOT SET")
+        log.error("Email credentials not set! "
+                  f"EMAIL_FROM: {EMAIL_FROM}, EMAIL_PASSWORD: {'SET' if EMAIL_PASSWORD else 'NOT SET'}")
         sys.exit(1)
     
-    # Run scanner
-    print("Creating V20Scanner instance...")
     scanner = V20Scanner(EXCEL_FILE, EMAIL_TO, EMAIL_FROM, EMAIL_PASSWORD)
-    
-    print("Calling run_scan()...")
     scanner.run_scan()
-    
-    print("\n" + "=" * 80)
-    print("SCRIPT EXECUTION COMPLETED")
-    print("=" * 80)